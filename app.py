@@ -1,6 +1,18 @@
 import os
+import re
+import math
+import time
+import heapq
+import logging
+import itertools
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from flask import Flask, render_template, request, redirect, url_for
+from flask_compress import Compress
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from apscheduler.schedulers.background import BackgroundScheduler
 import arxiv
 import feedparser
 from flask import send_from_directory
@@ -28,9 +40,32 @@ app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
     'pool_pre_ping': True,
     'pool_recycle': 300,
 }
+
+# Compress responses before sending them. A page of ten arXiv abstracts
+# is tens of KB of very compressible text, so this cuts transfer size
+# roughly 5-8x, which matters most on mobile networks.
+app.config['COMPRESS_MIN_SIZE'] = 500
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+Compress(app)
 # Initialize the database extension
 db = SQLAlchemy(app)
 
+# When pointed at a SQLite database (e.g. a local sqlite:/// URL during
+# development), tune it for our access pattern: WAL lets page reads
+# proceed while the background refresher is writing, synchronous=NORMAL
+# drops the per-commit fsync cost, and the remaining pragmas keep temp
+# data and hot pages in memory. Postgres deployments skip this entirely.
+if db_uri.startswith('sqlite'):
+    with app.app_context():
+        @event.listens_for(db.engine, 'connect')
+        def _set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute("PRAGMA temp_store=MEMORY")
+            cursor.execute("PRAGMA mmap_size=268435456")
+            cursor.close()
+
 # # Create tables in the new database if they don't exist.
 # # This runs when the app first starts.
 # with app.app_context():
@@ -38,6 +73,58 @@ db = SQLAlchemy(app)
 
 # Define pagination settings
 PER_PAGE = 10
+
+# A single shared arXiv client so every search reuses the same HTTP session
+# (connection pooling, no repeated TCP/TLS handshakes), and so the API's
+# politeness delay is enforced in one place per arXiv's terms of use.
+# page_size=100 means our max_results=50 searches complete in one page
+# fetch instead of several delayed ones.
+arxiv_client = arxiv.Client(page_size=100, delay_seconds=3.0, num_retries=3)
+
+# --- Result Caching ---
+
+# An identical arXiv query returns the same papers for minutes at a time,
+# so there is no point re-fetching on every page view (e.g. when the user
+# is just paging through results). We keep simple in-process caches of
+# {key: (fetched_at, value)} with a time-to-live per source. Concurrent
+# callers can race here — duplicating a fetch or trying to evict the
+# same key — so the helpers below mutate only with pop(..., None) and
+# never assume a key they saw is still present.
+ARXIV_CACHE_TTL = 900  # 15 minutes
+RSS_CACHE_TTL = 300    # 5 minutes
+
+# The search cache is keyed by user input (every distinct /search query
+# adds an entry), so it must be bounded or an outside caller can grow it
+# without limit.
+CACHE_MAX_ENTRIES = 256
+
+_search_cache = {}
+_rss_cache = {}
+
+
+def _cache_get(cache, key, ttl):
+    """Return the cached value for key if it is still fresh, else None."""
+    entry = cache.get(key)
+    if entry and time.time() - entry[0] < ttl:
+        return entry[1]
+    return None
+
+
+def _cache_set(cache, key, value, ttl):
+    """Store a value, evicting expired and oldest entries to stay bounded."""
+    now = time.time()
+    expired = [k for k, (fetched_at, _) in cache.items()
+               if now - fetched_at >= ttl]
+    for k in expired:
+        # A concurrent caller may have evicted the same key already.
+        cache.pop(k, None)
+    # Dicts iterate in insertion order, so the first key is the oldest.
+    while len(cache) >= CACHE_MAX_ENTRIES:
+        oldest = next(iter(cache), None)
+        if oldest is None:
+            break
+        cache.pop(oldest, None)
+    cache[key] = (now, value)
 # --- Database Model Definition ---
 
 # We define a class that represents the 'interests' table in our database.
@@ -49,6 +136,14 @@ class Interest(db.Model):
     # Add this new column to store the type ('topic' or 'author')
     interest_type = db.Column(db.String(50), nullable=False, default='topic')
 
+    # One row per keyword/type pair, enforced by the database itself.
+    # The composite index also makes the duplicate check in
+    # add_interest a single index probe.
+    __table_args__ = (
+        db.UniqueConstraint('keyword', 'interest_type',
+                            name='uq_interest_keyword_type'),
+    )
+
     def __repr__(self):
         return f'<Interest {self.keyword} ({self.interest_type})>'
     
@@ -59,25 +154,86 @@ class Bookmark(db.Model):
     summary = db.Column(db.Text, nullable=False)
     authors = db.Column(db.String(500), nullable=False)
     pdf_link = db.Column(db.String(200), nullable=False)
-    published_date = db.Column(db.String(50), nullable=False)
+    # A real Date column (not a string) so ordering and any future
+    # range filters compare dates natively through the index.
+    published_date = db.Column(db.Date, nullable=False)
+
+    # Index matching the bookmarks page ordering, so the database can
+    # hand back newest-first rows without a sort step.
+    __table_args__ = (
+        db.Index('ix_bookmark_published', published_date.desc()),
+    )
 
     def __repr__(self):
         return f'<Bookmark {self.title}>'
 
+class Paper(db.Model):
+    # Papers fetched by the background refresher. The home page reads
+    # from this table instead of calling arXiv on every request.
+    id = db.Column(db.Integer, primary_key=True)
+    entry_id = db.Column(db.String(100), unique=True, nullable=False)
+    title = db.Column(db.String(500), nullable=False)
+    summary = db.Column(db.Text, nullable=False)
+    authors = db.Column(db.String(500), nullable=False)
+    pdf_link = db.Column(db.String(200), nullable=False)
+    published_date = db.Column(db.String(50), nullable=False)
+    topic = db.Column(db.String(100), nullable=False)
+
+    def __repr__(self):
+        return f'<Paper {self.title}>'
+
+def get_bookmarked_ids(entry_ids):
+    """Return the subset of entry_ids that are bookmarked, as a set.
+
+    Queries only the ids of the papers being rendered, so the unique
+    index on Bookmark.entry_id touches at most one page worth of rows
+    instead of loading the whole table into memory.
+
+    Always returns a set so the 'in' checks in the templates stay O(1);
+    don't turn the result into a list anywhere downstream.
+    """
+    if not entry_ids:
+        return frozenset()
+    rows = db.session.query(Bookmark.entry_id).filter(
+        Bookmark.entry_id.in_(entry_ids)).all()
+    return {row[0] for row in rows}
+
 # The search_for_papers function remains exactly the same
 # In app.py
 
 def search_for_papers(keyword, search_type, max_results=50):
+    # A missing search field arrives as None; treat it as an empty
+    # search rather than crashing on .strip() below.
+    keyword = (keyword or '').strip()
+    if not keyword:
+        return []
+
+    # Serve repeat queries from the cache so paging through the feed
+    # doesn't hit arXiv again for every interest.
+    cache_key = (keyword, search_type, max_results)
+    cached = _cache_get(_search_cache, cache_key, ARXIV_CACHE_TTL)
+    if cached is not None:
+        return cached
+
     try:
         """
         Searches for papers on arXiv using a specific search type.
         """
-        query = keyword.strip()
-        
+        # Cap the length; very long queries come back as partial feeds.
+        query = keyword[:256]
+
         # Use the search_type to build the correct query string
         if search_type == 'author':
-            final_query = f'au:"{query}"'
-        else: # Default to a general topic search
+            # Strip characters that carry meaning in arXiv's query
+            # syntax (quotes, colons, parentheses); a stray one inside
+            # the quoted author name makes the query malformed and the
+            # API answers with empty or partial feeds.
+            safe = re.sub(r'[^\w\s.\-]', '', query).strip()
+            final_query = f'au:"{safe}"'
+        else:
+            # Default to a general topic search. Topic queries pass
+            # through verbatim: fielded syntax like cat:cs.CR is
+            # legitimate here.
             final_query = query
 
         print(f"Executing arXiv search with query: '{final_query}'")
@@ -88,50 +244,212 @@ def search_for_papers(keyword, search_type, max_results=50):
             sort_by=arxiv.SortCriterion.LastUpdatedDate
         )
 
-        found_papers = []
-        for result in search.results():
-            paper_info = {
-                "entry_id": result.entry_id,
-                "title": result.title,
-                "summary": result.summary,
-                "authors": [author.name for author in result.authors],
-                "published_date": result.published.strftime("%Y-%m-%d"),
-                "pdf_link": result.pdf_url,
-                "topic": keyword
-            }
-            found_papers.append(paper_info)
+        # Build the list in a single comprehension; CPython appends via
+        # the LIST_APPEND opcode instead of a method call per row.
+        # islice stops pulling from the result generator as soon as we
+        # have max_results papers, so no extra pages are fetched however
+        # the client is configured.
+        found_papers = [{
+            "entry_id": result.entry_id,
+            "title": result.title,
+            "summary": result.summary,
+            "authors": [author.name for author in result.authors],
+            "published_date": result.published.strftime("%Y-%m-%d"),
+            # Keep an epoch timestamp for sorting; comparing ints is
+            # cheaper than comparing date strings.
+            "published_ts": int(result.published.timestamp()),
+            "pdf_link": result.pdf_url,
+            "topic": keyword
+        } for result in itertools.islice(arxiv_client.results(search),
+                                         max_results)]
+        # Only successful fetches are cached; errors fall through so the
+        # next request retries.
+        _cache_set(_search_cache, cache_key, found_papers, ARXIV_CACHE_TTL)
         return found_papers
     except Exception as e:
         print(f"Error during arXiv search: {e}")
         return []
     
+# Per-feed conditional-GET state: url -> {'etag', 'modified', 'articles'}.
+# Once the TTL cache above expires we still re-fetch with these headers;
+# an unchanged feed answers 304 Not Modified with no body, and we reuse
+# the articles we already parsed.
+_feed_cache = {}
+
+
+def _fetch_feed(source_name, feed_url):
+    """Fetch one RSS feed with a conditional GET and return its articles."""
+    previous = _feed_cache.get(feed_url, {})
+    # Skip feedparser's HTML sanitizing and relative-URL resolution: we
+    # only read id/title/summary/link/published, the template strips
+    # tags from summaries anyway, and both passes cost real CPU on
+    # feeds with long entries.
+    feed = feedparser.parse(feed_url,
+                            etag=previous.get('etag'),
+                            modified=previous.get('modified'),
+                            resolve_relative_uris=False,
+                            sanitize_html=False)
+
+    # 304 means nothing changed upstream: no body was transferred and
+    # there is nothing new to parse.
+    if getattr(feed, 'status', None) == 304:
+        return previous['articles']
+
+    # Normalize the data into a common format. feedparser exposes the
+    # parsed publication time as a struct_time; turn it into an epoch
+    # int so articles sort chronologically (the RFC-822 strings in
+    # 'published' don't sort correctly as text).
+    articles = [{
+        'id': entry.get('id', entry.link), # Use link as a fallback ID
+        'title': entry.title,
+        'summary': entry.get('summary', 'No summary available.'),
+        'link': entry.link,
+        'published_date': entry.get('published', 'N/A'),
+        'published_ts': (int(time.mktime(entry.published_parsed))
+                         if entry.get('published_parsed') else 0),
+        'source': source_name,
+        'type': 'news' # Add a type to distinguish from papers
+    } for entry in feed.entries[:10]]
+
+    _feed_cache[feed_url] = {
+        'etag': getattr(feed, 'etag', None),
+        'modified': getattr(feed, 'modified', None),
+        'articles': articles,
+    }
+    return articles
+
+
 def fetch_rss_feeds():
     """Fetch articles from security RSS feeds"""
+    cached = _cache_get(_rss_cache, 'articles', RSS_CACHE_TTL)
+    if cached is not None:
+        return cached
+
     feeds = [
         ('The Hacker News', 'http://feeds.feedburner.com/TheHackerNews'),
         ('Dark Reading', 'https://darkreading.com/rss.xml'),
         ('Security Week', 'https://securityweek.com/feed/')
     ]
-    
+
+    # Each feed is an independent HTTP request, so download all three at
+    # the same time instead of waiting for each one in turn.
+    with ThreadPoolExecutor(max_workers=len(feeds)) as executor:
+        results = executor.map(lambda f: _fetch_feed(f[0], f[1]), feeds)
+
     all_articles = []
-    for source_name, feed_url in feeds:
-        feed = feedparser.parse(feed_url)
-        for entry in feed.entries[:10]:
-            # Normalize the data into a common format
-            article = {
-                'id': entry.get('id', entry.link), # Use link as a fallback ID
-                'title': entry.title,
-                'summary': entry.get('summary', 'No summary available.'),
-                'link': entry.link,
-                'published_date': entry.get('published', 'N/A'),
-                'source': source_name,
-                'type': 'news' # Add a type to distinguish from papers
-            }
-            all_articles.append(article)
-    
+    for articles in results:
+        all_articles.extend(articles)
+
+    _cache_set(_rss_cache, 'articles', all_articles, RSS_CACHE_TTL)
     return all_articles
 
+# --- Background Refresher ---
+
+# How often the background job pulls fresh papers from arXiv.
+REFRESH_INTERVAL_MINUTES = 10
+
+def refresh_all():
+    """Fetch papers for every interest and store them in the Paper table.
+
+    This runs on the background scheduler, so the home page never waits
+    on arXiv (which enforces a 3-second delay between requests); it just
+    reads whatever the most recent refresh saved.
+    """
+    with app.app_context():
+        interests = Interest.query.all()
+        if not interests:
+            return
+
+        # Overlapping interests return the same paper more than once.
+        # Deduplicate while collecting the results: setdefault keeps the
+        # first occurrence of each entry_id in a single pass, so each
+        # paper is visited (and upserted) exactly once.
+        unique_papers = {}
+        with ThreadPoolExecutor(max_workers=min(8, len(interests))) as executor:
+            results = executor.map(
+                lambda i: search_for_papers(i.keyword, i.interest_type),
+                interests)
+        for papers in results:
+            for paper_info in papers:
+                unique_papers.setdefault(paper_info['entry_id'], paper_info)
+
+        for paper_info in unique_papers.values():
+            # Insert new papers, update ones we've seen before (arXiv
+            # entries can be revised after first publication).
+            existing = Paper.query.filter_by(entry_id=paper_info['entry_id']).first()
+            if existing:
+                existing.title = paper_info['title']
+                existing.summary = paper_info['summary']
+                existing.authors = ', '.join(paper_info['authors'])
+                existing.pdf_link = paper_info['pdf_link']
+                existing.published_date = paper_info['published_date']
+                existing.topic = paper_info['topic']
+            else:
+                # Insert inside a savepoint so a unique-constraint hit
+                # (another worker refreshing the same paper between our
+                # check and the flush) loses only this row, not the
+                # whole batch.
+                try:
+                    with db.session.begin_nested():
+                        db.session.add(Paper(
+                            entry_id=paper_info['entry_id'],
+                            title=paper_info['title'],
+                            summary=paper_info['summary'],
+                            authors=', '.join(paper_info['authors']),
+                            pdf_link=paper_info['pdf_link'],
+                            published_date=paper_info['published_date'],
+                            topic=paper_info['topic']
+                        ))
+                except IntegrityError:
+                    pass
+        db.session.commit()
+        logger.info(f"Refreshed {len(unique_papers)} papers from arXiv")
+
+scheduler = BackgroundScheduler(daemon=True)
+
+def start_refresh_scheduler():
+    """Start the background refresher (once per serving process).
+
+    The first refresh runs right away so a fresh database isn't empty
+    for ten minutes.
+    """
+    scheduler.add_job(refresh_all, 'interval',
+                      minutes=REFRESH_INTERVAL_MINUTES,
+                      next_run_time=datetime.now())
+    scheduler.start()
+
+# A WSGI server importing this module starts the refresher here.
+# Running `python app.py` defers to the __main__ block at the bottom,
+# which skips the werkzeug reloader's watcher process so only the
+# serving child refreshes.
+if __name__ != "__main__":
+    start_refresh_scheduler()
+
 # --- Route Definitions ---
+
+@app.teardown_request
+def commit_session(exc):
+    """Commit the session once at the end of each request.
+
+    Every commit is an fsync, so the write handlers queue their changes
+    on the session and this single commit point flushes them together.
+    A failed request rolls back instead. An IntegrityError here is the
+    expected duplicate race (two requests adding the same interest at
+    once) and is dropped quietly; any other commit failure means a
+    write was lost after the handler already responded, so it is logged
+    loudly.
+    """
+    if exc is None:
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+        except SQLAlchemyError:
+            logger.exception("Commit failed at end of request; changes lost")
+            db.session.rollback()
+    else:
+        db.session.rollback()
+
 @app.route('/init-db')
 def init_db():
     try:
@@ -145,39 +463,21 @@ def init_db():
 @app.route('/page/<int:page>')
 def home(page=1):
     interests = Interest.query.all()
-    all_papers = []
-    for interest in interests:
-        papers = search_for_papers(interest.keyword, interest.interest_type)
-        all_papers.extend(papers)
-
-    # --- New Deduplication Logic ---
-    unique_papers = []
-    seen_ids = set()
-    for paper in all_papers:
-        if paper['entry_id'] not in seen_ids:
-            unique_papers.append(paper)
-            seen_ids.add(paper['entry_id'])
-    
-    # Sort the unique papers by date
-    unique_papers.sort(key=lambda x: x['published_date'], reverse=True)
-    
-    # --- New addition: Get a list of currently bookmarked paper IDs ---
-    bookmarked_ids = {b.entry_id for b in Bookmark.query.all()}
 
-    # --- Pagination Logic ---
-    start = (page - 1) * PER_PAGE
-    end = start + PER_PAGE
-    
-    # Get the slice of papers for the current page
-    paginated_papers = unique_papers[start:end]
-    # Calculate the total number of pages needed
-    total_pages = (len(unique_papers) // PER_PAGE) + (len(unique_papers) % PER_PAGE > 0)
-    
+    # The background refresher keeps the Paper table current, so serving
+    # the feed is a single paginated query instead of live arXiv calls.
+    # Deduplication comes for free from the UNIQUE entry_id column.
+    pagination = Paper.query.order_by(Paper.published_date.desc()).paginate(
+        page=page, per_page=PER_PAGE, error_out=False)
+
+    # Only check bookmark status for the papers on this page
+    bookmarked_ids = get_bookmarked_ids([p.entry_id for p in pagination.items])
+
     return render_template('index.html',
-                           papers=paginated_papers,
+                           papers=pagination.items,
                            interests=interests,
                            current_page=page,
-                           total_pages=total_pages,
+                           total_pages=pagination.pages,
                            bookmarked_ids=bookmarked_ids)
 
 
@@ -192,14 +492,20 @@ def add_interest():
     new_type = request.form.get('interest_type')
     
     if new_keyword and new_type:
-        # Check if this exact keyword/type combo already exists
-        existing = Interest.query.filter_by(keyword=new_keyword, interest_type=new_type).first()
-        if not existing:
-            # Create a new Interest object with the type
+        # Check if this exact keyword/type combo already exists.
+        # Selecting just the id means the unique index answers the
+        # question without loading a full row.
+        exists = db.session.query(Interest.id).filter_by(
+            keyword=new_keyword, interest_type=new_type).first() is not None
+        if not exists:
+            # Create a new Interest object with the type; the commit
+            # happens in commit_session at the end of the request. If a
+            # concurrent request inserted the same pair first, the
+            # unique constraint makes that commit roll back harmlessly.
             interest = Interest(keyword=new_keyword, interest_type=new_type)
             db.session.add(interest)
-            db.session.commit()
-            
+
+
     return redirect(url_for('home'))
 
 @app.route('/delete/<int:interest_id>')
@@ -207,20 +513,24 @@ def delete_interest(interest_id):
     # .get_or_404() is a handy function that either gets the object or returns a 404 Not Found error
     interest_to_delete = Interest.query.get_or_404(interest_id)
     
-    # Remove the object from the database session
+    # Remove the object from the database session; committed once at
+    # the end of the request
     db.session.delete(interest_to_delete)
-    
-    # Commit the change to the database
-    db.session.commit()
-    
+
     # Redirect the user back to the homepage
     return redirect(url_for('home'))
 
 @app.route('/bookmarks')
-def bookmarks():
-    # Query the database for all saved bookmarks
-    bookmarked_papers = Bookmark.query.order_by(Bookmark.published_date.desc()).all()
-    return render_template('bookmarks.html', papers=bookmarked_papers)
+@app.route('/bookmarks/page/<int:page>')
+def bookmarks(page=1):
+    # Fetch one page of bookmarks from the database instead of every
+    # row; the published_date index returns them already sorted.
+    pagination = Bookmark.query.order_by(Bookmark.published_date.desc()).paginate(
+        page=page, per_page=PER_PAGE, error_out=False)
+    return render_template('bookmarks.html',
+                           papers=pagination.items,
+                           current_page=page,
+                           total_pages=pagination.pages)
 
 @app.route('/toggle_bookmark', methods=['POST'])
 def toggle_bookmark():
@@ -233,7 +543,6 @@ def toggle_bookmark():
     if existing_bookmark:
         # If it exists, delete it (un-bookmark)
         db.session.delete(existing_bookmark)
-        db.session.commit()
     else:
         # If it doesn't exist, create a new bookmark
         new_bookmark = Bookmark(
@@ -242,11 +551,13 @@ def toggle_bookmark():
             summary=request.form.get('summary'),
             authors=request.form.get('authors'),            
             pdf_link=request.form.get('pdf_link'),
-            published_date=request.form.get('published_date')
+            # The form carries the date as 'YYYY-MM-DD'; store it as a
+            # real date object for the Date column.
+            published_date=datetime.strptime(
+                request.form.get('published_date'), '%Y-%m-%d').date()
         )
         db.session.add(new_bookmark)
-        db.session.commit()
-    
+
     # Redirect back to the page the user was on
     return redirect(request.referrer or url_for('home'))
 
@@ -263,12 +574,13 @@ def search():
         papers = search_for_papers(query, search_type, max_results=20)
         
         # We still need to know which papers are bookmarked to show the correct button state
-        bookmarked_ids = {b.entry_id for b in Bookmark.query.all()}
-        
+        bookmarked_ids = get_bookmarked_ids([p['entry_id'] for p in papers])
+
         return render_template('search.html', papers=papers, query=query, bookmarked_ids=bookmarked_ids)
 
     # If the user is just visiting the page (GET request), show the empty search form
-    return render_template('search.html', papers=None, query=None)
+    return render_template('search.html', papers=None, query=None,
+                           bookmarked_ids=frozenset())
 
 # In app.py, add this new route (e.g., after the home route)
 
@@ -276,15 +588,16 @@ def search():
 @app.route('/news/page/<int:page>')
 def news(page=1):
     news_articles = fetch_rss_feeds()
-    
-    # Sort articles by published date
-    news_articles.sort(key=lambda x: x.get('published_date', ''), reverse=True)
-    
-    # Paginate the results
+
+    # Paginate the results. We only need the articles up to the end of
+    # the requested page, so pick the newest `end` with a heap instead
+    # of sorting the whole list (O(N log end) vs O(N log N)).
     start = (page - 1) * PER_PAGE
     end = start + PER_PAGE
-    paginated_articles = news_articles[start:end]
-    total_pages = (len(news_articles) // PER_PAGE) + (len(news_articles) % PER_PAGE > 0)
+    newest = heapq.nlargest(end, news_articles,
+                            key=lambda x: x['published_ts'])
+    paginated_articles = newest[start:end]
+    total_pages = math.ceil(len(news_articles) / PER_PAGE)
     
     return render_template('news.html',
                            articles=paginated_articles,
@@ -298,4 +611,10 @@ def sw():
 if __name__ == "__main__":
     # with app.app_context():
     #     db.create_all()  # Creates tables if they don't exist
+
+    # The debug reloader imports this module twice: once in the watcher
+    # parent and once in the serving child, which sets WERKZEUG_RUN_MAIN.
+    # Start the refresher only in the child so a single process writes.
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_refresh_scheduler()
     app.run(debug=True)